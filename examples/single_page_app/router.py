@@ -1,4 +1,5 @@
-from typing import Callable, Dict, Union
+import json
+from typing import Callable, Dict, Optional, Union
 
 from nicegui import background_tasks, helpers, ui
 
@@ -11,11 +12,13 @@ class Router():
 
     def __init__(self) -> None:
         self.routes: Dict[str, Callable] = {}
+        self.paths: Optional[Dict[Callable, str]] = None  # reverse lookup, built lazily on first use
         self.content: ui.element = None
 
     def add(self, path: str):
         def decorator(func: Callable):
             self.routes[path] = func
+            self.paths = None
             return func
         return decorator
 
@@ -24,14 +27,18 @@ class Router():
             path = target
             builder = self.routes[target]
         else:
-            path = {v: k for k, v in self.routes.items()}[target]
+            if self.paths is None:
+                self.paths = {v: k for k, v in self.routes.items()}
+            path = self.paths[target]
             builder = target
 
+        path_js = json.dumps(path)  # escapes quotes and backslashes in the path
+
         async def build() -> None:
             with self.content:
                 ui.run_javascript(f'''
-                    if (window.location.pathname !== "{path}") {{
-                        history.pushState({{page: "{path}"}}, "", "{path}");
+                    if (window.location.pathname !== {path_js}) {{
+                        history.pushState({{page: {path_js}}}, "", {path_js});
                     }}
                 ''')
                 result = builder()
@@ -24,6 +24,6 @@ export default {
         }, 10);
     },
     props: {
-        base_path: String
+        base_path: {type: String, default: '/'}
     },
 };
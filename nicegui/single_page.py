@@ -1,11 +1,15 @@
 import inspect
+import json
+import re
 import urllib.parse
-from typing import Callable, Dict, Union, Optional, Tuple
+from collections.abc import Hashable
+from typing import Callable, Dict, FrozenSet, Sequence, Union, Optional, Tuple
 
 from fastapi import HTTPException
 from fastapi.routing import APIRoute
 
 from nicegui import background_tasks, helpers, ui, core, Client, app
+from nicegui.events import GenericEventArguments
 
 SPR_PAGE_BODY = '__singlePageContent'
 
@@ -20,12 +24,16 @@ class SinglePageRouterFrame(ui.element, component='single_page.js'):
         :param base_path: The base path of the single page router which shall be tracked (e.g. when clicking on links)
         """
         super().__init__()
-        self._props["base_path"] = base_path
+        if base_path != '/':  # the default is not serialized to keep the element's payload small
+            self._props["base_path"] = base_path
+        self.target_url: Optional[str] = None  # the URL of the currently displayed page
 
 
 class SinglePageRouterEntry:
     """The SinglePageRouterEntry is a data class which holds the configuration of a single page router route"""
 
+    __slots__ = ('path', 'builder', 'title', 'is_coroutine', 'argument_names', 'converters')
+
     def __init__(self, path: str, builder: Callable, title: Union[str, None] = None):
         """
         :param path: The path of the route
@@ -35,6 +43,162 @@ class SinglePageRouterEntry:
         self.path = path
         self.builder = builder
         self.title = title
+        # the builder is inspected once here instead of on every navigation
+        self.is_coroutine = helpers.is_coroutine_function(builder)
+        # names of the accepted keyword arguments or None if the builder accepts arbitrary ones
+        self.argument_names: Optional[FrozenSet[str]] = None
+        # names and type annotations of the annotated parameters, i.e. the only arguments which are converted
+        self.converters: Tuple[Tuple[str, Callable], ...] = ()
+        try:
+            parameters = inspect.signature(builder).parameters
+        except (ValueError, TypeError):
+            return  # builders without signature (e.g. some C callables) receive all arguments unconverted
+        if not any(param.kind == inspect.Parameter.VAR_KEYWORD for param in parameters.values()):
+            self.argument_names = frozenset(parameters)
+        self.converters = tuple((name, param.annotation) for name, param in parameters.items()
+                                if param.annotation is not inspect.Parameter.empty)
+
+
+class SinglePageRouteTrie:
+    """The SinglePageRouteTrie stores the routes of a single page router in a tree of path segments, so that a path
+    can be resolved by walking its segments instead of comparing it with every single registered route.
+
+    Static segments take precedence over parameter segments such as `{id}`, e.g. `/user/me` is preferred over
+    `/user/{id}` independent of the order in which the routes were registered."""
+
+    class Node:
+        """A single path segment of the route trie"""
+
+        __slots__ = ('children', 'params', 'entry')
+
+        def __init__(self) -> None:
+            self.children: Dict[str, 'SinglePageRouteTrie.Node'] = {}
+            self.params: Dict[str, 'SinglePageRouteTrie.Node'] = {}
+            self.entry: Optional[SinglePageRouterEntry] = None
+
+    def __init__(self) -> None:
+        self.root = SinglePageRouteTrie.Node()
+
+    @staticmethod
+    def from_routes(routes: Dict[str, SinglePageRouterEntry]) -> 'SinglePageRouteTrie':
+        """Creates a trie containing all given routes
+
+        :param routes: The routes by path
+        """
+        trie = SinglePageRouteTrie()
+        for route, entry in routes.items():
+            trie.add(route, entry)
+        return trie
+
+    def add(self, route: str, entry: SinglePageRouterEntry) -> None:
+        """Adds a route to the trie
+
+        :param route: The route path, optionally containing parameters such as `/user/{id}`
+        :param entry: The entry to return when the route is resolved
+        """
+        node = self.root
+        for element in self.split_path(route):
+            if element.startswith('{') and element.endswith('}') and len(element) > 2:
+                node = node.params.setdefault(element[1:-1], SinglePageRouteTrie.Node())
+            else:
+                node = node.children.setdefault(element, SinglePageRouteTrie.Node())
+        node.entry = entry
+
+    @staticmethod
+    def split_path(path: str) -> Tuple[str, ...]:
+        """Splits a path (without query string) into the segments used as keys of the trie"""
+        return tuple(path.lstrip('/').split('/'))
+
+    def resolve(self, path_segments: Sequence[str]) -> Tuple[Optional[SinglePageRouterEntry], Dict[str, str]]:
+        """Resolves the given path to its entry
+
+        :param path_segments: The segments of the path as returned by split_path
+        :return: The matching entry (or None if not found) and the extracted path arguments
+        """
+        path_args: Dict[str, str] = {}
+        entry = self._resolve(self.root, path_segments, 0, path_args)
+        return entry, path_args
+
+    def _resolve(self, node: 'SinglePageRouteTrie.Node', elements: Sequence[str], index: int,
+                 path_args: Dict[str, str]) -> Optional[SinglePageRouterEntry]:
+        if index == len(elements):
+            return node.entry
+        element = elements[index]
+        child = node.children.get(element)
+        if child is not None:
+            entry = self._resolve(child, elements, index + 1, path_args)
+            if entry is not None:
+                return entry
+        for name, child in node.params.items():  # backtrack to parameter segments if no static route matched
+            entry = self._resolve(child, elements, index + 1, path_args)
+            if entry is not None:
+                path_args[name] = element
+                return entry
+        return None
+
+
+class SinglePageRoutes(dict):
+    """The SinglePageRoutes are the routes of a single page router by path. The route trie and the builder lookup are
+    derived lazily from the dictionary's content, so routes can still be added, replaced or removed directly."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._trie: Optional[SinglePageRouteTrie] = None
+        self._builders: Optional[Dict[Callable, SinglePageRouterEntry]] = None
+
+    @property
+    def trie(self) -> SinglePageRouteTrie:
+        """The route trie, rebuilt on first access after the routes changed"""
+        if self._trie is None:
+            self._trie = SinglePageRouteTrie.from_routes(self)
+        return self._trie
+
+    @property
+    def builders(self) -> Dict[Callable, SinglePageRouterEntry]:
+        """The entries by builder function, rebuilt on first access after the routes changed. If a builder is
+        registered for several paths, its first route is used. Unhashable builders are not included."""
+        if self._builders is None:
+            self._builders = {}
+            for entry in self.values():
+                if isinstance(entry.builder, Hashable):
+                    self._builders.setdefault(entry.builder, entry)
+        return self._builders
+
+    def _invalidate(self) -> None:
+        self._trie = None
+        self._builders = None
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self._invalidate()
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self._invalidate()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self._invalidate()
+
+    def pop(self, *args):
+        self._invalidate()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._invalidate()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self._invalidate()
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs) -> None:
+        super().update(*args, **kwargs)
+        self._invalidate()
 
 
 class UrlParameterResolver:
@@ -52,6 +216,7 @@ class UrlParameterResolver:
         self.query_string = components[1] if len(components) > 1 else ""
         self.query_args = {}
         self.path = path
+        self.path_segments = SinglePageRouteTrie.split_path(path)
         self.path_args = {}
         self.parse_query()
         self.entry = self.resolve_path()
@@ -59,25 +224,12 @@ class UrlParameterResolver:
             self.convert_arguments()
 
     def resolve_path(self) -> Optional[SinglePageRouterEntry]:
-        """Splits the path into its components, tries to match it with the routes and extracts the path arguments
-        into their corresponding variables.
+        """Resolves the path via the route trie and extracts the path arguments into their corresponding variables.
         """
-        for route, entry in self.routes.items():
-            route_elements = route.lstrip('/').split("/")
-            path_elements = self.path.lstrip('/').split("/")
-            if len(route_elements) != len(path_elements):  # can't match
-                continue
-            match = True
-            for i, route_element_path in enumerate(route_elements):
-                if route_element_path.startswith("{") and route_element_path.endswith("}") and len(
-                        route_element_path) > 2:
-                    self.path_args[route_element_path[1:-1]] = path_elements[i]
-                elif path_elements[i] != route_element_path:
-                    match = False
-                    break
-            if match:
-                return entry
-        return None
+        routes = self.routes
+        route_trie = routes.trie if isinstance(routes, SinglePageRoutes) else SinglePageRouteTrie.from_routes(routes)
+        entry, self.path_args = route_trie.resolve(self.path_segments)
+        return entry
 
     def parse_query(self):
         """Parses the query string of the URL into a dictionary of key-value pairs"""
@@ -85,13 +237,12 @@ class UrlParameterResolver:
 
     def convert_arguments(self):
         """Converts the path and query arguments to the expected types of the builder function"""
-        sig = inspect.signature(self.entry.builder)
-        for name, param in sig.parameters.items():
+        for name, annotation in self.entry.converters:
             for params in [self.path_args, self.query_args]:
                 if name in params:
                     # Convert parameter to the expected type
                     try:
-                        params[name] = param.annotation(params[name])
+                        params[name] = annotation(params[name])
                     except ValueError as e:
                         raise ValueError(f"Could not convert parameter {name}: {e}")
 
@@ -130,9 +281,11 @@ class SinglePageRouter:
         :param on_session_created: Optional callback which is called when a new session is created.
         """
         super().__init__()
-        self.routes: Dict[str, SinglePageRouterEntry] = {}
+        self.routes: Dict[str, SinglePageRouterEntry] = SinglePageRoutes()
         self.base_path = path
+        self._path_mask = re.compile(re.escape(path) + '(?!_)')  # internal routes such as /_nicegui are excluded
         self._find_api_routes()
+        self._not_found_entry = SinglePageRouterEntry(path.rstrip('/'), self.build_page_not_found)
         self.content_area_class = SinglePageRouterFrame
         self.on_session_created: Optional[Callable] = on_session_created
 
@@ -178,7 +331,7 @@ class SinglePageRouter:
 
         :return: The content area element
         """
-        content = self.content_area_class(self.base_path).on('open', lambda e: self.open(e.args))
+        content = self.content_area_class(self.base_path).on('open', self._handle_open)
         app.storage.session[SPR_PAGE_BODY] = content
         return content
 
@@ -205,9 +358,9 @@ class SinglePageRouter:
         :return: The SinglePageRouterEntry or None if not found
         """
         if isinstance(target, Callable):
-            for path, entry in self.routes.items():
-                if entry.builder == target:
-                    return entry, {}, {}
+            if isinstance(target, Hashable) and isinstance(self.routes, SinglePageRoutes):
+                return self.routes.builders.get(target), {}, {}
+            return next((entry for entry in self.routes.values() if entry.builder == target), None), {}, {}
         else:
             target = target.rstrip("/")
             entry = self.routes.get(target, None)
@@ -216,41 +369,86 @@ class SinglePageRouter:
                 return parser.entry, parser.path_args, parser.query_args
             return entry, {}, {}
 
-    def open(self, target: Union[Callable, str, Tuple[str, bool]]) -> None:
+    def open(self, target: Union[Callable, str, Tuple[str, bool]],
+             frame: Optional[SinglePageRouterFrame] = None, force: bool = False) -> None:
         """Open a new page in the browser by exchanging the content of the root page's slot element
 
         :param target: the target route or builder function. If a list is passed, the second element is a boolean
-                        indicating whether the navigation should be server side only and not update the browser."""
+                        indicating whether the navigation should be server side only and not update the browser.
+        :param frame: the content area to update. If not passed, it is looked up in the current session's storage.
+        :param force: rebuild the content even if the target is already displayed (default: False)"""
         if isinstance(target, list):
             target, server_side = target  # unpack the list
         else:
             server_side = True
         entry, route_args, query_args = self.get_router_entry(target)
+        if isinstance(target, str):
+            target_url = self._normalize_url(target)
+        elif entry is not None:
+            target_url = entry.path or '/'  # the root route's path is stripped
+        else:
+            target_url = None  # an unresolved builder has no URL which could be pushed to the history
         if entry is None:
-            entry = ui.label(f"Page not found: {target}").classes("text-red-500")  # Could be beautified
+            entry, route_args, query_args = self._not_found_entry, {'target': str(target)}, {}
+        content = frame if frame is not None else app.storage.session[SPR_PAGE_BODY]
+        if not force and target_url is not None and target_url == content.target_url:
+            return  # the page is already displayed, e.g. when clicking the link of the current page
+        content.target_url = target_url
         title = entry.title if entry.title is not None else core.app.config.title
-        ui.run_javascript(f'document.title = "{title}"')
-        if server_side:
-            ui.run_javascript(f'window.history.pushState({{page: "{target}"}}, "", "{target}");')
+        js_code = ''
+        if title != content.client.title:  # most navigations within an app keep the current title
+            content.client.title = title
+            js_code += f'document.title = {json.dumps(title)};'
+        if server_side and target_url is not None:
+            target_url_js = json.dumps(target_url)
+            js_code += f'window.history.pushState({{page: {target_url_js}}}, "", {target_url_js});'
 
         async def build(content_element, kwargs) -> None:
             with content_element:
                 result = entry.builder(**kwargs)
-                if helpers.is_coroutine_function(entry.builder):
+                if entry.is_coroutine:
                     await result
 
-        content = app.storage.session[SPR_PAGE_BODY]
         content.clear()
         combined_dict = {**route_args, **query_args}
+        if entry.argument_names is not None:  # skip arguments the builder does not accept
+            combined_dict = {name: combined_dict[name] for name in combined_dict.keys() & entry.argument_names}
         background_tasks.create(build(content, combined_dict))
+        if js_code:
+            content.client.run_javascript(js_code)  # title and history update are sent as a single message
+
+    def _handle_open(self, e: GenericEventArguments) -> None:
+        """Handles the open events emitted by the content area when the user navigates on the client side"""
+        self.open(e.args, frame=e.sender)
+
+    def build_page_not_found(self, target: str) -> None:
+        """Builds the content shown if no route matches the target. Can be overridden to customize the page.
+
+        :param target: The target URL or builder function which could not be resolved
+        """
+        ui.label(f"Page not found: {target}").classes("text-red-500")
+
+    @staticmethod
+    def _normalize_url(url: str) -> str:
+        """Strips trailing slashes from the path of the given URL the same way the routes are stored, e.g. `/about/` and
+        `/about` as well as `/` and `` are considered to be the same page"""
+        path, separator, query = url.partition('?')
+        return (path.rstrip('/') or '/') + separator + query
+
+    def matches(self, path: str) -> bool:
+        """Checks whether the given path is handled by this single page router
+
+        :param path: The path to check
+        :return: True if the path is located below the router's base path and is not an internal route
+        """
+        return self._path_mask.match(path) is not None
 
     def _find_api_routes(self):
         """Find all API routes already defined via the @page decorator, remove them and redirect them to the
         single page router"""
         page_routes = set()
         for key, route in Client.page_routes.items():
-            if (route.startswith(self.base_path) and
-                    not route[len(self.base_path):].startswith("_")):
+            if self.matches(route):
                 page_routes.add(route)
                 Client.single_page_routes[route] = self
                 title = None
@@ -258,7 +456,5 @@ class SinglePageRouter:
                     title = Client.page_configs[key].title
                 route = route.rstrip("/")
                 self.routes[route] = SinglePageRouterEntry(route, builder=key, title=title)
-        for route in core.app.routes.copy():
-            if isinstance(route, APIRoute):
-                if route.path in page_routes:
-                    core.app.routes.remove(route)
+        core.app.routes[:] = [route for route in core.app.routes
+                              if not (isinstance(route, APIRoute) and route.path in page_routes)]
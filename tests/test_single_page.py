@@ -0,0 +1,314 @@
+import pytest
+
+from nicegui import background_tasks, ui
+from nicegui.single_page import (SinglePageRouter, SinglePageRouterEntry, SinglePageRoutes, SinglePageRouteTrie,
+                                 UrlParameterResolver)
+from nicegui.testing import Screen
+
+
+def build_trie(*paths: str) -> SinglePageRouteTrie:
+    trie = SinglePageRouteTrie()
+    for path in paths:
+        trie.add(path, SinglePageRouterEntry(path.rstrip('/'), builder=lambda: None))
+    return trie
+
+
+def resolve(trie: SinglePageRouteTrie, path: str):
+    return trie.resolve(SinglePageRouteTrie.split_path(path))
+
+
+def test_resolve_static_routes():
+    trie = build_trie('/', '/about', '/services/compute')
+    assert resolve(trie, '')[0].path == ''
+    assert resolve(trie, '/about')[0].path == '/about'
+    assert resolve(trie, '/services/compute')[0].path == '/services/compute'
+    assert resolve(trie, '/services')[0] is None
+    assert resolve(trie, '/unknown')[0] is None
+
+
+def test_resolve_path_parameters():
+    trie = build_trie('/user/{user_id}', '/user/{user_id}/posts/{post_id}')
+    entry, path_args = resolve(trie, '/user/42')
+    assert entry.path == '/user/{user_id}'
+    assert path_args == {'user_id': '42'}
+    entry, path_args = resolve(trie, '/user/42/posts/7')
+    assert entry.path == '/user/{user_id}/posts/{post_id}'
+    assert path_args == {'user_id': '42', 'post_id': '7'}
+
+
+def test_static_segments_take_precedence():
+    trie = build_trie('/user/{user_id}', '/user/me', '/{section}/settings')
+    entry, path_args = resolve(trie, '/user/me')
+    assert entry.path == '/user/me'
+    assert path_args == {}
+    entry, path_args = resolve(trie, '/user/settings')
+    assert entry.path == '/user/{user_id}'
+    assert path_args == {'user_id': 'settings'}
+
+
+def test_backtracking_to_parameter_segment():
+    trie = build_trie('/user/me', '/user/{user_id}/posts')
+    entry, path_args = resolve(trie, '/user/me/posts')
+    assert entry.path == '/user/{user_id}/posts'
+    assert path_args == {'user_id': 'me'}
+
+
+def test_url_parameter_resolver():
+    def builder(user_id: int):
+        pass
+    routes = {'/user/{user_id}': SinglePageRouterEntry('/user/{user_id}', builder=builder)}
+    resolver = UrlParameterResolver(routes, '/user/42/?tab=posts')
+    assert resolver.entry.path == '/user/{user_id}'
+    assert resolver.path_args == {'user_id': 42}
+    assert resolver.query_args == {'tab': ['posts']}
+
+
+def test_routes_can_be_modified_directly():
+    def user(user_id: int):
+        pass
+    router = SinglePageRouter('/spa_routes/')
+    router.routes['/spa_routes/user/{user_id}'] = SinglePageRouterEntry('/spa_routes/user/{user_id}', builder=user)
+    assert router.get_router_entry('/spa_routes/user/42')[0].builder is user
+
+    del router.routes['/spa_routes/user/{user_id}']
+    assert router.get_router_entry('/spa_routes/user/42')[0] is None
+
+    router.routes.update({'/spa_routes/user/{user_id}': SinglePageRouterEntry('/spa_routes/user/{user_id}', user)})
+    assert router.get_router_entry('/spa_routes/user/42')[1] == {'user_id': 42}
+    assert isinstance(router.routes, SinglePageRoutes)
+
+
+def test_matches_base_path():
+    router = SinglePageRouter('/spa_mask/')
+    assert router.matches('/spa_mask/')
+    assert router.matches('/spa_mask/about')
+    assert not router.matches('/spa_mask/_internal')
+    assert not router.matches('/other')
+
+
+def test_resolve_builder_targets():
+    def about():
+        pass
+    router = SinglePageRouter('/spa_builder/')
+    router.add_page('/spa_builder/about', about)
+    assert router.get_router_entry(about)[0].path == '/spa_builder/about'
+    assert router.get_router_entry(lambda: None)[0] is None
+
+
+def test_unannotated_arguments_are_not_converted():
+    def builder(user_id, tab: str):
+        pass
+    routes = {'/user/{user_id}/{tab}': SinglePageRouterEntry('/user/{user_id}/{tab}', builder=builder)}
+    resolver = UrlParameterResolver(routes, '/user/42/posts')
+    assert resolver.path_args == {'user_id': '42', 'tab': 'posts'}
+
+
+def test_builder_is_inspected_on_registration():
+    class Builder:
+        __hash__ = None  # type: ignore
+
+        def __call__(self, user_id: int, **kwargs):
+            pass
+
+    entry = SinglePageRouterEntry('/user/{user_id}', builder=Builder())
+    assert entry.argument_names is None
+    assert entry.converters == (('user_id', int),)
+    assert not entry.is_coroutine
+
+
+def test_builder_without_signature():
+    entry = SinglePageRouterEntry('/', builder=dict)  # builtin types have no inspectable signature
+    assert entry.argument_names is None
+    assert entry.converters == ()
+
+
+def test_builder_resolves_to_first_route():
+    def about():
+        pass
+    router = SinglePageRouter('/spa_first/')
+    router.add_page('/spa_first/about', about, title='A')
+    router.add_page('/spa_first/info', about)
+    router.add_page('/spa_first/about', about, title='B')
+    assert router.get_router_entry(about)[0].title == 'B'
+
+    router.add_page('/spa_first/about', lambda: None)
+    assert router.get_router_entry(about)[0].path == '/spa_first/info'
+
+
+def test_page_not_found(screen: Screen):
+    @ui.page('/')
+    def index():
+        ui.label('Index page')
+        ui.button('Open unknown builder', on_click=lambda: router.open(lambda: None))
+
+    router = SinglePageRouter('/')
+    router.setup_page_routes()
+
+    screen.open('/unknown')
+    screen.should_contain('Page not found: /unknown')
+
+    screen.open('/')
+    screen.click('Open unknown builder')
+    screen.should_contain('Page not found')
+    assert screen.selenium.current_url == f'http://localhost:{Screen.PORT}/', 'unresolved builders must keep the URL'
+
+
+def test_same_url_is_not_rebuilt(screen: Screen):
+    builds = []
+
+    @ui.page('/')
+    def index():
+        builds.append('index')
+        ui.link('Index link', '/')
+        ui.button('Open index builder', on_click=lambda: router.open(index))
+        ui.button('Rebuild', on_click=lambda: router.open('/', force=True))
+
+    router = SinglePageRouter('/')
+    router.setup_page_routes()
+
+    screen.open('/')
+    screen.should_contain('Index link')
+    screen.click('Index link')
+    screen.wait(0.5)
+    assert builds == ['index']
+
+    screen.click('Open index builder')
+    screen.wait(0.5)
+    assert builds == ['index']
+
+    screen.click('Rebuild')
+    screen.wait(0.5)
+    assert builds == ['index', 'index']
+
+
+def test_open_in_given_frame(screen: Screen):
+    @ui.page('/')
+    def index():
+        ui.label('Index page')
+
+    @ui.page('/about')
+    def about():
+        ui.label('About page')
+
+    class CustomRouter(SinglePageRouter):
+        def setup_root_page(self):
+            main_frame = self.setup_content_area()
+            self.setup_content_area()  # the session storage refers to this second frame
+            ui.button('About', on_click=lambda: self.open('/about', frame=main_frame))
+
+    CustomRouter('/').setup_page_routes()
+
+    screen.open('/')
+    screen.should_contain('Index page')
+    screen.click('About')
+    screen.should_contain('About page')
+    screen.should_contain('Index page')
+
+
+def test_normalize_url():
+    normalize = SinglePageRouter._normalize_url  # pylint: disable=protected-access
+    assert normalize('') == normalize('/') == '/'
+    assert normalize('/about/') == normalize('/about') == '/about'
+    assert normalize('/about/?tab=posts') == '/about?tab=posts'
+
+
+class FakeFrame:
+    def __init__(self) -> None:
+        self.target_url = None
+        self.client = self
+        self.title = 'Index'
+        self.javascript = []
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *_) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def run_javascript(self, code: str) -> None:
+        self.javascript.append(code)
+
+
+def test_open_skips_displayed_page(monkeypatch):
+    builds = []
+
+    def run_build(coroutine):
+        with pytest.raises(StopIteration):
+            coroutine.send(None)  # the builders are synchronous, so the build completes without suspending
+
+    monkeypatch.setattr(background_tasks, 'create', run_build)
+    router = SinglePageRouter('/spa_open/')
+    router.add_page('/spa_open', lambda: builds.append('index'), title='Index')
+    router.add_page('/spa_open/user/{user_id}', lambda user_id: builds.append(user_id), title='User')
+    frame = FakeFrame()
+
+    router.open('/spa_open/user/42', frame=frame)
+    assert builds == ['42']
+    assert frame.target_url == '/spa_open/user/42'
+    assert frame.javascript == ['document.title = "User";'
+                                'window.history.pushState({page: "/spa_open/user/42"}, "", "/spa_open/user/42");']
+
+    router.open('/spa_open/user/42/', frame=frame)
+    assert builds == ['42'], 'the displayed page must not be rebuilt'
+
+    router.open('/spa_open/user/42', frame=frame, force=True)
+    assert builds == ['42', '42']
+    assert frame.javascript[-1] == 'window.history.pushState({page: "/spa_open/user/42"}, "", "/spa_open/user/42");'
+
+    router.open(['/spa_open/', False], frame=frame)
+    assert builds == ['42', '42', 'index']
+    assert frame.javascript[-1] == 'document.title = "Index";'
+
+
+def test_page_titles(screen: Screen):
+    @ui.page('/', title='Same')
+    def index():
+        ui.button('Other', on_click=lambda: router.open('/other'))
+
+    @ui.page('/other', title='Same')
+    def other():
+        ui.label('Other page')
+        ui.button('Different', on_click=lambda: router.open('/different'))
+
+    @ui.page('/different', title='Different')
+    def different():
+        ui.label('Different page')
+        ui.button('Custom', on_click=lambda: router.open('/custom'))
+
+    @ui.page('/custom', title='Same')
+    def custom():
+        ui.page_title('Custom title')
+        ui.label('Custom page')
+        ui.button('Index', on_click=lambda: router.open('/'))
+
+    router = SinglePageRouter('/')
+    router.setup_page_routes()
+
+    screen.open('/')
+    screen.wait(0.5)
+    assert screen.selenium.title == 'Same'
+
+    screen.click('Other')
+    screen.should_contain('Other page')
+    screen.wait(0.5)
+    assert screen.selenium.title == 'Same'
+    assert screen.selenium.current_url.endswith('/other')
+
+    screen.click('Different')
+    screen.should_contain('Different page')
+    screen.wait(0.5)
+    assert screen.selenium.title == 'Different'
+    assert screen.selenium.current_url.endswith('/different')
+
+    screen.click('Custom')
+    screen.should_contain('Custom page')
+    screen.wait(0.5)
+    assert screen.selenium.title == 'Custom title'
+
+    screen.click('Index')
+    screen.wait(0.5)
+    assert screen.selenium.title == 'Same', 'titles set via ui.page_title must not suppress the next title update'
+    assert screen.selenium.current_url == f'http://localhost:{Screen.PORT}/'